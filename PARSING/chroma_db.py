@@ -0,0 +1,477 @@
+"""
+ChromaDB persistence layer for the enriched RAG data: deterministic
+IDs, Ollama embeddings, and collection management.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import chromadb
+import numpy as np
+import requests
+from langchain_ollama import OllamaEmbeddings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import blake3  # SIMD-parallel hash; much cheaper per call than SHA-256
+except ImportError:
+    blake3 = None
+
+try:
+    import httpx  # async client: many in-flight embeds on one thread
+except ImportError:
+    httpx = None
+
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+
+log = logging.getLogger("chroma_db")
+
+_EMBED_ERRORS = (requests.RequestException,) + (
+    (httpx.HTTPError,) if httpx is not None else ()
+)
+
+
+def _is_overload(exc) -> bool:
+    """True for failures that shrinking the batch can actually fix."""
+    if isinstance(exc, (requests.Timeout,) + (
+        (httpx.TimeoutException,) if httpx is not None else ()
+    )):
+        return True
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None)
+    return status in (413, 500, 502, 503, 504)
+
+
+class ChromaDBManager:
+    """
+    Wraps a persistent Chroma collection with deterministic content IDs
+    so re-ingesting the same chunks is idempotent.
+    """
+
+    def __init__(
+        self,
+        collection_name: str = "pdf_documents",
+        persist_directory: str = "./chroma_db",
+        embedding_model: str = "nomic-embed-text",
+        id_hash: str = "blake3",
+        embed_batch_size: int = 64,
+        embed_workers: int = 8,
+        insert_batch_size: int = 200,
+        vector_dtype: str = "float32",
+        normalize: bool = False,
+        hnsw_params: dict = None,
+        ollama_hosts: list = None,
+    ):
+        """
+        id_hash "blake3" (default) is the fast path; pass "sha256" when
+        adding to a collection that was ingested before the switch, so
+        IDs keep matching and dedup still works. embed_batch_size and
+        embed_workers trade Ollama request size against concurrency;
+        the defaults keep a local server saturated without queueing.
+        vector_dtype "float16" halves vector bytes on disk and in the
+        HNSW working set at a typically negligible recall cost; keep
+        the default for collections that must match fp32 exactly.
+        normalize=True L2-normalizes vectors at ingest and query and
+        switches the index to raw inner product, which ranks
+        identically to cosine over unit vectors but skips the
+        per-comparison norm division inside HNSW traversal. Only set it
+        when creating a collection: the space is fixed at creation.
+        """
+        self.client = chromadb.PersistentClient(path=persist_directory)
+        self.collection_name = collection_name
+        # Index parameters only apply when the collection is first
+        # created; the defaults (M=16, low search_ef) are tuned for tiny
+        # collections and can make queries an order of magnitude slower
+        # than needed. M=24 suits the usual sub-1M-chunk range here.
+        self.normalize = normalize
+        self._collection_metadata = hnsw_params or {
+            "hnsw:space": "ip" if normalize else "cosine",
+            "hnsw:M": 24,
+            "hnsw:construction_ef": 128,
+            "hnsw:search_ef": 100,
+        }
+        self.collection = self.client.get_or_create_collection(
+            collection_name, metadata=self._collection_metadata
+        )
+        self.embedding_model = embedding_model
+        # Batches round-robin across these; one entry means the usual
+        # single local server. OLLAMA_HOSTS=host1,host2 spreads ingest
+        # over several Ollama instances.
+        self.hosts = ollama_hosts or [
+            h.strip()
+            for h in os.environ.get("OLLAMA_HOSTS", OLLAMA_HOST).split(",")
+            if h.strip()
+        ]
+        # Kept as the fallback path for Ollama servers that predate the
+        # batched /api/embed endpoint.
+        self.embedding_function = OllamaEmbeddings(model=embedding_model)
+        self.embed_batch_size = embed_batch_size
+        # Adaptive batch sizing: starts at embed_batch_size, halves on
+        # timeouts/overload responses and creeps back up after a run of
+        # successes, so ingest survives an overloaded Ollama without
+        # hand-tuning the batch size per deployment.
+        self._current_bs = embed_batch_size
+        self._bs_successes = 0
+        self.max_workers = embed_workers
+        self.insert_batch_size = insert_batch_size
+        self._vec_dtype = np.float16 if vector_dtype == "float16" else np.float32
+        # Cached blobs are dtype-specific; keying the cache on it keeps
+        # fp32 and fp16 entries from being misread as each other.
+        self._cache_model_key = f"{embedding_model}/{vector_dtype}"
+        self.id_hash = id_hash if blake3 is not None else "sha256"
+        self._hasher = (
+            blake3.blake3 if self.id_hash == "blake3" else hashlib.sha256
+        )
+        # One keep-alive session for every Ollama call, with automatic
+        # backoff on the transient 5xx responses Ollama emits under load.
+        self._session = requests.Session()
+        self._session.mount(
+            "http://",
+            HTTPAdapter(
+                pool_connections=8,
+                pool_maxsize=16,
+                max_retries=Retry(
+                    total=3, backoff_factor=0.2, status_forcelist=[502, 503, 504]
+                ),
+            ),
+        )
+        self._use_batch_endpoint = True
+        self._cached_count = None
+        # Embeddings survive across runs keyed by content id + model:
+        # re-ingesting after editing one page only pays Ollama for the
+        # chunks that actually changed. add_documents runs on writer
+        # threads (EmbeddingGenerator, pipeline, the API's to_thread),
+        # so the connection is shared across threads behind a lock, as
+        # in StatusStore.
+        self._cache_db = sqlite3.connect(
+            os.path.join(persist_directory, "embed_cache.sqlite"),
+            check_same_thread=False,
+        )
+        self._cache_lock = threading.Lock()
+        self._cache_db.execute(
+            "CREATE TABLE IF NOT EXISTS emb"
+            " (h TEXT, model TEXT, v BLOB, PRIMARY KEY (h, model))"
+        )
+
+    def close(self):
+        self._session.close()
+        self._cache_db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _embed_batch_single(self, texts, host=None):
+        """
+        Embeds one batch with a single POST to Ollama's /api/embed, which
+        accepts a list input — one HTTP roundtrip per batch instead of the
+        one-request-per-text behavior of the legacy /api/embeddings
+        endpoint that OllamaEmbeddings wraps. Falls back to the langchain
+        client on servers too old to have /api/embed.
+        """
+        if self._use_batch_endpoint:
+            response = self._session.post(
+                f"{host or self.hosts[0]}/api/embed",
+                json={"model": self.embedding_model, "input": texts},
+                timeout=60,
+            )
+            if response.status_code != 404:
+                response.raise_for_status()
+                return response.json()["embeddings"]
+            self._use_batch_endpoint = False
+        return self.embedding_function.embed_documents(texts)
+
+    def _generate_deterministic_id(self, content: str) -> str:
+        """Stable across runs so identical chunks dedupe on re-ingest."""
+        return self._hasher(content.encode("utf-8")).hexdigest()
+
+    def _embed_with_cache(self, contents, ids):
+        """
+        Returns one embedding per content, consulting the on-disk cache
+        first and calling Ollama only for the misses. Vectors are stored
+        as raw float32 bytes (compact, zero-copy decode via frombuffer).
+        """
+        found = {}
+        with self._cache_lock:
+            for i in range(0, len(ids), 500):  # stay under sqlite's var limit
+                batch = ids[i : i + 500]
+                rows = self._cache_db.execute(
+                    "SELECT h, v FROM emb WHERE model = ? AND h IN (%s)"
+                    % ",".join("?" * len(batch)),
+                    [self._cache_model_key, *batch],
+                )
+                for h, v in rows:
+                    found[h] = np.frombuffer(v, dtype=self._vec_dtype)
+
+        miss_idx = [i for i, id_ in enumerate(ids) if id_ not in found]
+        if miss_idx:
+            fresh = self._embed_batched([contents[i] for i in miss_idx])
+            with self._cache_lock:
+                self._cache_db.executemany(
+                    "INSERT OR REPLACE INTO emb (h, model, v) VALUES (?, ?, ?)",
+                    [
+                        (ids[i], self._cache_model_key,
+                         np.asarray(v, dtype=self._vec_dtype).tobytes())
+                        for i, v in zip(miss_idx, fresh)
+                    ],
+                )
+                self._cache_db.commit()
+            for i, v in zip(miss_idx, fresh):
+                found[ids[i]] = np.asarray(v, dtype=self._vec_dtype)
+        return [found[id_] for id_ in ids]
+
+    async def _aembed(self, batches):
+        """Runs all batch POSTs on one event loop, max_workers in flight."""
+        sem = asyncio.Semaphore(self.max_workers)
+
+        async def one(batch, host):
+            async with sem:
+                r = await client.post(
+                    f"{host}/api/embed",
+                    json={"model": self.embedding_model, "input": batch},
+                )
+                r.raise_for_status()
+                return r.json()["embeddings"]
+
+        async with httpx.AsyncClient(
+            timeout=60, limits=httpx.Limits(max_connections=self.max_workers)
+        ) as client:
+            return await asyncio.gather(
+                *(
+                    one(b, self.hosts[i % len(self.hosts)])
+                    for i, b in enumerate(batches)
+                ),
+                return_exceptions=True,
+            )
+
+    def _embed_batched(self, contents):
+        """
+        Embeds contents with the adaptive batch size: overload failures
+        (timeouts, 413, 5xx) halve the batch size and retry, and ten
+        clean passes grow it 25% back toward embed_batch_size. Only the
+        failed batches are retried — results from batches that already
+        succeeded in the same pass are kept, so one flaky timeout near
+        the end of a large ingest does not re-embed everything.
+        """
+        out = [None] * len(contents)
+        spans = [
+            (i, min(i + self._current_bs, len(contents)))
+            for i in range(0, len(contents), self._current_bs)
+        ]
+        while spans:
+            results = self._embed_once([contents[s:e] for s, e in spans])
+            failed = []
+            first_exc = None
+            for (s, e), result in zip(spans, results):
+                if isinstance(result, Exception):
+                    if not _is_overload(result):
+                        raise result
+                    failed.append((s, e))
+                    first_exc = first_exc or result
+                else:
+                    out[s:e] = result
+            if not failed:
+                self._bs_successes += 1
+                if (
+                    self._bs_successes >= 10
+                    and self._current_bs < self.embed_batch_size
+                ):
+                    self._current_bs = min(
+                        self.embed_batch_size,
+                        self._current_bs + self._current_bs // 4 + 1,
+                    )
+                    self._bs_successes = 0
+                    log.info("Embed batch size recovered to %d", self._current_bs)
+                break
+            if self._current_bs <= 1:
+                raise first_exc
+            self._current_bs = max(1, self._current_bs // 2)
+            self._bs_successes = 0
+            log.warning(
+                "⚠️ %d embed batches overloaded (%s); retrying them at batch size %d",
+                len(failed), first_exc, self._current_bs,
+            )
+            spans = [
+                (s2, min(s2 + self._current_bs, e))
+                for s, e in failed
+                for s2 in range(s, e, self._current_bs)
+            ]
+        return out
+
+    def _embed_once(self, batches):
+        """
+        One concurrent pass over the given batches, so the Ollama
+        embedding server works on several at once instead of one
+        round-trip per call. Returns one entry per batch — either its
+        embeddings or the exception it raised, letting the caller keep
+        successes when a sibling batch fails. Prefers the
+        single-threaded async client; falls back to a thread pool over
+        the pooled session when httpx is unavailable or the server
+        lacks /api/embed.
+        """
+        if httpx is not None and self._use_batch_endpoint:
+            results = asyncio.run(self._aembed(batches))
+            if not any(
+                isinstance(r, httpx.HTTPStatusError)
+                and r.response.status_code == 404
+                for r in results
+            ):
+                return results
+            self._use_batch_endpoint = False
+        hosts = [self.hosts[i % len(self.hosts)] for i in range(len(batches))]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [
+                executor.submit(self._embed_batch_single, b, h)
+                for b, h in zip(batches, hosts)
+            ]
+            results = []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except _EMBED_ERRORS as exc:
+                    results.append(exc)
+            return results
+
+    def add_documents(self, contents, metadatas=None):
+        """Embeds and stores a list of chunk strings with their metadata."""
+        # Empty and near-empty strings still cost a full Ollama roundtrip
+        # and come back as useless zero-ish vectors; drop them up front.
+        keep = [i for i, c in enumerate(contents) if c and len(c.strip()) >= 4]
+        if len(keep) < len(contents):
+            log.info("Skipping %d empty chunks", len(contents) - len(keep))
+            contents = [contents[i] for i in keep]
+            if metadatas:
+                metadatas = [metadatas[i] for i in keep]
+        if not contents:
+            return 0
+        # Bind the hash constructor locally: no method dispatch and no
+        # id_hash branch inside the per-chunk loop.
+        hasher = self._hasher
+        ids = [hasher(c.encode("utf-8")).hexdigest() for c in contents]
+
+        # Chroma dedupes IDs on add, but only after we have paid for the
+        # embeddings — the expensive part. Fetch existing IDs first and
+        # embed only the delta, so re-ingestion runs are near-free.
+        # Repeated table headers and boilerplate produce identical chunk
+        # strings; keep the first occurrence of each id so duplicates in
+        # the same batch are neither embedded nor inserted twice.
+        existing = set(self.collection.get(ids=ids, include=[])["ids"])
+        new_idx = []
+        for i, id_ in enumerate(ids):
+            if id_ not in existing:
+                existing.add(id_)
+                new_idx.append(i)
+        if not new_idx:
+            log.info("All chunks already indexed; nothing to embed.")
+            return 0
+
+        new_contents = [contents[i] for i in new_idx]
+        new_ids = [ids[i] for i in new_idx]
+        new_metadatas = [metadatas[i] for i in new_idx] if metadatas else None
+
+        log.info(
+            "Embedding %d new chunks (%d already indexed)...",
+            len(new_contents), len(contents) - len(new_contents),
+        )
+        # One contiguous (N, D) float32 array instead of nested Python
+        # lists: half the bytes per float, no per-value boxing, and no
+        # re-parsing work inside Chroma.
+        embeddings = np.asarray(
+            self._embed_with_cache(new_contents, new_ids), dtype=self._vec_dtype
+        )
+        if self.normalize:
+            embeddings = self._l2_normalize(embeddings)
+        # One giant add makes Chroma materialize the whole payload at
+        # once; mid-hundreds batches amortize transaction overhead
+        # without the memory spike.
+        # upsert keeps re-processing idempotent even if another writer
+        # raced the delta check above.
+        step = self.insert_batch_size
+        for i in range(0, len(new_ids), step):
+            self.collection.upsert(
+                ids=new_ids[i : i + step],
+                embeddings=embeddings[i : i + step],
+                documents=new_contents[i : i + step],
+                metadatas=new_metadatas[i : i + step] if new_metadatas else None,
+            )
+        if self._cached_count is not None:
+            self._cached_count += len(new_ids)
+        log.info("✅ Added %d chunks to '%s'", len(new_contents), self.collection_name)
+        return len(new_contents)
+
+    @staticmethod
+    def _l2_normalize(arr):
+        norms = np.linalg.norm(arr, axis=-1, keepdims=True)
+        np.clip(norms, 1e-12, None, out=norms)
+        return arr / norms
+
+    def count(self, force: bool = False) -> int:
+        """
+        Collection size, cached locally. Chroma's count() is a segment
+        scan that gets expensive at scale, so the value is fetched once
+        and then maintained by add_documents/clear_collection; pass
+        force=True to re-read from the store.
+        """
+        if force or self._cached_count is None:
+            self._cached_count = self.collection.count()
+        return self._cached_count
+
+    def query(self, text: str, n_results: int = 5):
+        embedding = np.asarray(
+            self._embed_batch_single([text])[0], dtype=self._vec_dtype
+        )
+        if self.normalize:
+            embedding = self._l2_normalize(embedding)
+        return self.collection.query(
+            query_embeddings=[embedding], n_results=n_results
+        )
+
+    def verify_embeddings(self, sample_size: int = 5):
+        """
+        Sanity-checks the collection with one count and one get: pulls a
+        small sample including the vectors themselves and confirms they
+        are present, consistently shaped, and non-zero — a row count
+        alone can't tell whether embeddings were actually stored.
+        """
+        total = self.count()
+        if not total:
+            log.info("Collection '%s' is empty", self.collection_name)
+            return False
+        sample = self.collection.get(
+            limit=min(sample_size, total),
+            include=["metadatas", "documents", "embeddings"],
+        )
+        vecs = np.asarray(sample["embeddings"], dtype=np.float32)
+        ok = vecs.ndim == 2 and vecs.shape[1] > 0 and float(
+            np.linalg.norm(vecs, axis=1).min()
+        ) > 0.0
+        log.info(
+            "Collection '%s': %d docs, embedding dim %s, sample %s",
+            self.collection_name,
+            total,
+            vecs.shape[1] if vecs.ndim == 2 else "?",
+            "✅ ok" if ok else "⚠️ has zero/missing vectors",
+        )
+        return ok
+
+    def clear_collection(self):
+        """
+        Drops and recreates the collection. The old implementation
+        fetched every document and embedding into memory just to list
+        IDs for an O(N) delete; dropping the collection is one sqlite
+        statement regardless of size.
+        """
+        self.client.delete_collection(self.collection_name)
+        self.collection = self.client.get_or_create_collection(
+            self.collection_name, metadata=self._collection_metadata
+        )
+        self._cached_count = 0
+        log.info("Cleared collection '%s'", self.collection_name)
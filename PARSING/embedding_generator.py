@@ -0,0 +1,144 @@
+"""
+Validates the chunk file produced by DocumentChunker and loads it into
+ChromaDB in fixed-size batches.
+"""
+
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import List, Union
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from chroma_db import ChromaDBManager
+
+try:
+    import ijson  # incremental JSON parser; keeps peak RAM at O(batch)
+except ImportError:
+    ijson = None
+
+log = logging.getLogger("embedding_generator")
+
+
+class Chunk(BaseModel):
+    id: str
+    content: str
+    content_type: str
+    # int for single pages, str for the "2-3" ranges that
+    # merge_cross_page_blocks assigns to cross-page runs.
+    page_no: Union[int, str, None] = None
+    neighbour: List[str] = []
+
+
+# Batch validation runs in pydantic-core's Rust loop instead of one
+# Python model_validate call per item.
+_CHUNK_LIST = TypeAdapter(List[Chunk])
+
+
+class EmbeddingGenerator:
+    """Streams validated chunks from disk into the Chroma collection."""
+
+    def __init__(
+        self,
+        input_path: str = "output_processed.json",
+        db_manager: ChromaDBManager = None,
+        batch_size: int = 500,
+        vector_dtype: str = "float32",
+    ):
+        """
+        vector_dtype "float16" halves the vector footprint on disk and
+        in HNSW RAM for a typically sub-percent recall cost; the
+        precision choice is baked into the manager's embedding cache
+        keys, so switching never mixes fp16 and fp32 blobs.
+        """
+        self.input_path = input_path
+        self.db_manager = db_manager or ChromaDBManager(vector_dtype=vector_dtype)
+        self.batch_size = batch_size
+
+    def _iter_raw(self):
+        if ijson is not None:
+            with open(self.input_path, "rb") as f:
+                yield from ijson.items(f, "item")
+        else:
+            with open(self.input_path, encoding="utf-8") as f:
+                yield from json.load(f)
+
+    def iter_chunks(self):
+        """
+        Yields validated Chunk objects. With ijson the input file is
+        parsed incrementally, so a multi-GB chunk file never has to fit
+        in memory; validation runs over batch_size slices through the
+        compiled list adapter rather than item by item.
+        """
+        raw = self._iter_raw()
+        while True:
+            batch = list(islice(raw, self.batch_size))
+            if not batch:
+                return
+            try:
+                yield from _CHUNK_LIST.validate_python(batch)
+            except ValidationError:
+                # Rare path: re-validate item by item so one malformed
+                # record is skipped instead of aborting the whole run.
+                for item in batch:
+                    try:
+                        yield Chunk.model_validate(item)
+                    except ValidationError as exc:
+                        log.warning(
+                            "⚠️ Skipping invalid chunk %s: %s",
+                            item.get("id", "<no id>") if isinstance(item, dict) else item,
+                            exc,
+                        )
+
+    def load_and_validate_chunks(self):
+        """Materializes the full chunk list; prefer iter_chunks for ingest."""
+        return list(self.iter_chunks())
+
+    def add_chunks_to_db(self):
+        """
+        Consumes iter_chunks in batch_size slices and adds each batch to
+        the collection, so only one batch of chunks and embeddings is
+        alive at a time. Each add_documents call (embed + Chroma write,
+        both I/O) runs on a single writer thread while the main thread
+        parses and validates the next batch, overlapping the two stages
+        instead of strictly alternating them.
+        """
+        total = 0
+        chunks = self.iter_chunks()
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            pending = None
+            while True:
+                batch = list(islice(chunks, self.batch_size))
+                if not batch:
+                    break
+                # Read fields straight out of __dict__: one pass over the
+                # batch, no per-field Pydantic attribute dispatch and no
+                # model_dump traversal.
+                contents = []
+                metadatas = []
+                for c in batch:
+                    d = c.__dict__
+                    contents.append(d["content"])
+                    metadatas.append(
+                        {
+                            "content_type": d["content_type"],
+                            "page_no": d["page_no"] if d["page_no"] is not None else -1,
+                            "neighbour": ",".join(d["neighbour"]),
+                        }
+                    )
+                if pending is not None:
+                    total += pending.result()
+                pending = writer.submit(
+                    self.db_manager.add_documents, contents, metadatas
+                )
+            if pending is not None:
+                total += pending.result()
+        log.info("✅ Ingested %d new chunks from %s", total, self.input_path)
+        return total
+
+
+if __name__ == "__main__":
+    logging.basicConfig(format="%(message)s", level=logging.INFO)
+    generator = EmbeddingGenerator()
+    generator.add_chunks_to_db()
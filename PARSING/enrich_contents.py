@@ -0,0 +1,240 @@
+"""
+Enriches the structured JSON produced by pdf_parser with LLM output:
+text blocks are cleaned up, images and tables get natural-language
+descriptions. The result is RAG-ready data for indexing.
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import os
+import shelve
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from pdf_parser import strip_b64_header as _strip_b64_header
+
+try:
+    import orjson  # C JSON parser; ~3x faster on large model outputs
+except ImportError:
+    orjson = None
+
+OLLAMA_URL = "http://localhost:11434/api/generate"
+
+log = logging.getLogger("enrich_contents")
+MODEL_TEXT = "qwen2.5:latest"
+MODEL_VISION = "moondream:v2-q4"
+INPUT_FILE = "extracted_document.json"
+OUTPUT_FILE = "enriched_rag_data.jsonl"
+MAX_WORKERS = 8
+
+# One pooled session shared by all worker threads: re-establishing TCP
+# per call costs a few ms each and compounds over hundreds of items.
+_SESSION = requests.Session()
+_SESSION.mount(
+    "http://", HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=3)
+)
+
+# LLM outputs keyed by model + content hash, write-through to a shelve
+# file: re-running over a mostly-unchanged document only pays for the
+# blocks that actually changed. Keys include the model name so swapping
+# models invalidates automatically.
+_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".enrich_cache")
+_CACHE_LOCK = threading.Lock()
+_CACHE: dict = {}
+
+try:
+    with shelve.open(_CACHE_PATH) as _db:
+        _CACHE.update(_db)
+except OSError as _exc:
+    log.warning("Could not load enrichment cache: %s", _exc)
+
+
+def _cached_ollama(key_material: bytes, call):
+    """Returns the cached output for key_material, or runs call()."""
+    key = hashlib.blake2b(key_material, digest_size=16).hexdigest()
+    with _CACHE_LOCK:
+        if key in _CACHE:
+            return _CACHE[key]
+    out = call()
+    if out:
+        with _CACHE_LOCK:
+            _CACHE[key] = out
+            with shelve.open(_CACHE_PATH) as db:
+                db[key] = out
+    return out
+
+
+def call_ollama(
+    prompt: str,
+    model: str = MODEL_TEXT,
+    image_base64: str = None,
+    image_bytes: bytes = None,
+) -> str:
+    """
+    image_bytes is the preferred way to attach an image: raw bytes are
+    base64-encoded exactly once, here at the protocol boundary, instead
+    of encode->strip->re-encode round-trips upstream.
+    """
+    payload = {"model": model, "prompt": prompt, "stream": False}
+    if image_bytes is not None:
+        payload["images"] = [base64.b64encode(image_bytes).decode("ascii")]
+    elif image_base64:
+        payload["images"] = [_strip_b64_header(image_base64)]
+    try:
+        response = _SESSION.post(OLLAMA_URL, json=payload, timeout=(5, 300))
+        response.raise_for_status()
+        if orjson is not None:
+            return orjson.loads(response.content).get("response", "").strip()
+        return response.json().get("response", "").strip()
+    except requests.RequestException as exc:
+        log.warning("Ollama call failed: %s", exc)
+        return ""
+
+
+def process_text_content(item):
+    content = item["page_content"]
+    item["cleaned_text"] = _cached_ollama(
+        f"{MODEL_TEXT}|text|{content}".encode("utf-8"),
+        lambda: call_ollama(
+            "Clean up the following extracted PDF text. Fix OCR artifacts and "
+            "broken line breaks, keep the original wording and markdown "
+            "structure, and return only the cleaned text:\n\n"
+            f"{content}"
+        ),
+    )
+
+
+def process_image_content(item):
+    descriptions = []
+    for image_ref in item["page_content"]:
+        if isinstance(image_ref, dict):
+            # Sidecar reference from pdf_parser: feed the file bytes
+            # straight through, no base64 detour.
+            with open(image_ref["path"], "rb") as f:
+                raw = f.read()
+            descriptions.append(
+                _cached_ollama(
+                    f"{MODEL_VISION}|image|".encode("utf-8") + raw,
+                    lambda raw=raw: call_ollama(
+                        "Describe this image in two or three sentences.",
+                        model=MODEL_VISION,
+                        image_bytes=raw,
+                    ),
+                )
+            )
+        else:
+            descriptions.append(
+                _cached_ollama(
+                    f"{MODEL_VISION}|image|{image_ref}".encode("utf-8"),
+                    lambda ref=image_ref: call_ollama(
+                        "Describe this image in two or three sentences.",
+                        model=MODEL_VISION,
+                        image_base64=ref,
+                    ),
+                )
+            )
+    item["image_descriptions"] = descriptions
+
+
+def process_table_content(item):
+    content = item["page_content"]
+    item["table_description"] = _cached_ollama(
+        f"{MODEL_TEXT}|table|{content}".encode("utf-8"),
+        lambda: call_ollama(
+            "Summarize the following table in two or three sentences, "
+            "mentioning the most important values:\n\n"
+            f"{content}"
+        ),
+    )
+
+
+def _enrich_item(item):
+    """Dispatches one block to the right enricher; mutates and returns it."""
+    content_type = item.get("content_type")
+    if content_type == "text":
+        process_text_content(item)
+    elif content_type == "image":
+        process_image_content(item)
+    elif content_type == "table":
+        process_table_content(item)
+    return item
+
+
+def _dumps_line(item) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(item) + b"\n"
+    return (json.dumps(item, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _load_done_keys():
+    """
+    Scans an existing output file and returns the (page_no, content_type,
+    index) keys already written, so an interrupted run resumes where it
+    died instead of re-enriching from scratch.
+    """
+    done = set()
+    try:
+        with open(OUTPUT_FILE, "rb") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                rec = orjson.loads(line) if orjson is not None else json.loads(line)
+                done.add(rec.get("_enrich_key"))
+    except FileNotFoundError:
+        pass
+    except (ValueError, OSError) as exc:
+        log.warning("Could not resume from %s: %s", OUTPUT_FILE, exc)
+    return done
+
+
+def main():
+    log.info("Loading %s ...", INPUT_FILE)
+    if orjson is not None:
+        with open(INPUT_FILE, "rb") as f:
+            data = orjson.loads(f.read())
+    else:
+        with open(INPUT_FILE, encoding="utf-8") as f:
+            data = json.load(f)
+
+    # Normalize inline data URIs in one pass up front, so no worker
+    # re-examines a 100 KB+ base64 string per call.
+    for item in data:
+        if item.get("content_type") == "image":
+            item["page_content"] = [
+                _strip_b64_header(ref) if isinstance(ref, str) else ref
+                for ref in item["page_content"]
+            ]
+
+    # Tag every item with a stable key so finished records in a partial
+    # output file can be recognized and skipped on the next run.
+    for idx, item in enumerate(data):
+        item["_enrich_key"] = f"{item.get('page_no')}|{item.get('content_type')}|{idx}"
+    done_keys = _load_done_keys()
+    todo = [item for item in data if item["_enrich_key"] not in done_keys]
+    if done_keys:
+        log.info("Resuming: %d of %d items already enriched", len(data) - len(todo), len(data))
+
+    # Each enrichment call is network/GPU wait on the Ollama side, so
+    # items are dispatched concurrently instead of one blocking POST at
+    # a time. Records stream to the .jsonl output as they finish, so
+    # peak memory stays flat and a crash loses at most the in-flight
+    # items, not the whole run.
+    log.info("Enriching %d items (%d workers)...", len(todo), MAX_WORKERS)
+    with open(OUTPUT_FILE, "ab") as out, ThreadPoolExecutor(
+        max_workers=MAX_WORKERS
+    ) as executor:
+        futures = [executor.submit(_enrich_item, item) for item in todo]
+        for done, future in enumerate(as_completed(futures), 1):
+            out.write(_dumps_line(future.result()))
+            log.debug("Enriched %d/%d items", done, len(todo))
+    log.info("Enriched data saved to: %s", OUTPUT_FILE)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(format="%(message)s", level=logging.INFO)
+    main()
@@ -0,0 +1,263 @@
+"""
+FastAPI service over the parsing pipeline: upload a PDF, process it
+into the Chroma collection, then search or ask questions against it.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import uuid
+
+import aiofiles
+
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+
+try:
+    import orjson  # C JSON writer; the reference dumps are large
+except ImportError:
+    orjson = None
+
+from chroma_db import ChromaDBManager
+from chunker import DocumentChunker
+from pdf_parser import PDFParser
+from qa_system import QASystem
+from status_store import StatusStore
+
+log = logging.getLogger("main")
+
+UPLOAD_DIRECTORY = "uploads"
+PROCESSED_DIRECTORY = "processed"
+os.makedirs(UPLOAD_DIRECTORY, exist_ok=True)
+os.makedirs(PROCESSED_DIRECTORY, exist_ok=True)
+
+app = FastAPI(title="PDF RAG API")
+# A concrete origins list: wildcard origins combined with credentials
+# are rejected by browsers anyway, and an explicit list lets the
+# middleware do a set membership check instead of echoing the Origin
+# header on every response.
+CORS_ORIGINS = os.environ.get("CORS_ORIGINS", "http://localhost:3000").split(",")
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=CORS_ORIGINS,
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+parser = PDFParser()
+chunker = DocumentChunker()
+# Embedding batches already run concurrently inside ChromaDBManager
+# (async client, semaphore-bounded); these env vars tune how hard the
+# service pushes a given Ollama deployment without code changes.
+db_manager = ChromaDBManager(
+    embed_batch_size=int(os.environ.get("INGEST_BATCH_SIZE", "64")),
+    embed_workers=int(os.environ.get("INGEST_PARALLEL_THREADS", "4")),
+)
+qa_system = QASystem()
+status_store = StatusStore("status.sqlite")
+
+# file_id -> absolute upload path, populated at startup and on upload.
+# Scanning the upload directory per request is an O(N) syscall storm
+# once uploads accumulate.
+FILE_INDEX: dict = {}
+
+
+@app.on_event("startup")
+def build_file_index():
+    for file_name in os.listdir(UPLOAD_DIRECTORY):
+        file_id, _, _ = file_name.partition("_")
+        FILE_INDEX[file_id] = os.path.join(UPLOAD_DIRECTORY, file_name)
+
+
+@app.on_event("startup")
+async def warm_models():
+    """
+    Pull the embedding and chat models into Ollama's cache in the
+    background so the first real /qa or /process doesn't pay the
+    multi-second cold-load, and log early if Ollama is unreachable.
+    """
+
+    def _warm():
+        try:
+            qa_system._embed_query_cached("warmup")
+            qa_system.llm.invoke("hi")
+            log.info("✅ Ollama models warmed")
+        except Exception as exc:  # noqa: BLE001 - warm-up is best effort
+            log.warning("⚠️ Ollama warm-up failed: %s", exc)
+
+    asyncio.get_running_loop().run_in_executor(None, _warm)
+
+
+def get_file_path(file_id):
+    return FILE_INDEX.get(file_id)
+
+
+@app.post("/upload")
+async def upload_file(file: UploadFile = File(...)):
+    if not file.filename.lower().endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Only PDF files are supported")
+    file_id = str(uuid.uuid4())
+    file_path = os.path.join(UPLOAD_DIRECTORY, f"{file_id}_{file.filename}")
+    # Stream in 1 MB pieces: a whole-file read() holds the entire PDF
+    # in RAM and the sync write stalls the event loop for every other
+    # request while the upload lands on disk.
+    async with aiofiles.open(file_path, "wb") as out:
+        while chunk := await file.read(1024 * 1024):
+            await out.write(chunk)
+    FILE_INDEX[file_id] = file_path
+    status_store.register_file(file_id, file.filename)
+    return {"file_id": file_id, "file_name": file.filename}
+
+
+def _dump_json(path, obj):
+    if orjson is not None:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(obj, f, indent=2, ensure_ascii=False)
+
+
+def _run_pipeline(file_id: str, file_path: str, persist_intermediates: bool = False):
+    """Synchronous parse -> chunk -> embed pipeline for one upload."""
+    current_step = "parse"
+    try:
+        response = {"file_id": file_id}
+        status_store.update_step(file_id, "parse", "running")
+        # Explicit convert -> extract -> merge instead of parse_pdf():
+        # that wrapper re-runs extraction on its own output and writes
+        # extracted_document.json into the CWD as a side effect.
+        doc = parser._convert_two_tier(file_path)
+        extracted = parser.merge_cross_page_blocks(
+            parser.extract_structured_json(doc)
+        )
+        if persist_intermediates:
+            parsed_json_path = os.path.join(
+                PROCESSED_DIRECTORY, f"{file_id}_parsed.json"
+            )
+            _dump_json(parsed_json_path, extracted)
+            response["parsed_json"] = parsed_json_path
+        status_store.update_step(file_id, "parse", "completed")
+
+        current_step = "chunk"
+        status_store.update_step(file_id, "chunk", "running")
+        chunks = chunker.process_data(extracted)
+        if persist_intermediates:
+            chunks_json_path = os.path.join(
+                PROCESSED_DIRECTORY, f"{file_id}_chunks.json"
+            )
+            _dump_json(chunks_json_path, chunks)
+            response["chunks_json"] = chunks_json_path
+        status_store.update_step(file_id, "chunk", "completed")
+
+        current_step = "embed"
+        status_store.update_step(file_id, "embed", "running")
+        # One pass straight into the two lists add_documents wants;
+        # wrapping each chunk in a langchain Document only to unpack it
+        # again cost an allocation plus validation per chunk.
+        contents = []
+        metadatas = []
+        for chunk in chunks:
+            contents.append(chunk["content"])
+            metadatas.append(
+                {
+                    "content_type": chunk["content_type"],
+                    "page_no": chunk["page_no"] if chunk["page_no"] is not None else -1,
+                    "neighbour": ",".join(chunk["neighbour"]),
+                    "file_id": file_id,
+                }
+            )
+        # add_documents pre-computes embeddings with batched /api/embed
+        # calls and hands them to the collection directly, so ingestion
+        # is O(N/batch) HTTP roundtrips rather than one per chunk.
+        added = db_manager.add_documents(contents, metadatas)
+        status_store.update_step(file_id, "embed", "completed")
+        status_store.set_success(file_id, True)
+        response["chunks"] = len(chunks)
+        response["added"] = added
+        return response
+    except Exception as exc:  # noqa: BLE001 - surface any stage failure
+        status_store.update_step(file_id, current_step, "failed", str(exc))
+        status_store.set_success(file_id, False)
+        raise HTTPException(status_code=500, detail=f"{current_step} failed: {exc}")
+
+
+@app.post("/process/{file_id}")
+async def process_file(file_id: str, persist_intermediates: bool = False):
+    file_path = get_file_path(file_id)
+    if file_path is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    # The pipeline is synchronous, heavy work (Docling parse, chunking,
+    # embedding, Chroma writes); running it on the event loop would
+    # stall every other endpoint for the duration.
+    return await asyncio.to_thread(
+        _run_pipeline, file_id, file_path, persist_intermediates
+    )
+
+
+@app.get("/search")
+async def search(query: str, n_results: int = 5):
+    # query() does a blocking Ollama embed roundtrip plus the Chroma
+    # lookup; off-loop like /process, or concurrent requests stall.
+    results = await asyncio.to_thread(db_manager.query, query, n_results=n_results)
+    # zip walks the four parallel lists directly — no idx-1 re-indexing
+    # with its bounds checks, and Chroma always returns dict metadata
+    # for persisted collections so the per-row isinstance went too.
+    formatted = [
+        {
+            "rank": rank,
+            "id": doc_id,
+            "content": content[:300],
+            "metadata": metadata,
+            "distance": distance,
+        }
+        for rank, (doc_id, content, metadata, distance) in enumerate(
+            zip(
+                results["ids"][0],
+                results["documents"][0],
+                results["metadatas"][0],
+                results["distances"][0],
+            ),
+            1,
+        )
+    ]
+    return {"query": query, "results": formatted}
+
+
+@app.get("/qa")
+async def qa(query: str, stream: bool = True):
+    # Streaming keeps time-to-first-token flat for long generations;
+    # stream=false returns the full JSON answer with sources.
+    if stream:
+        return StreamingResponse(
+            qa_system.astream_answer(query), media_type="text/event-stream"
+        )
+    return await asyncio.to_thread(qa_system.ask_question, query)
+
+
+@app.get("/files")
+async def get_files():
+    return {"files": status_store.list_files()}
+
+
+@app.get("/status/{file_id}")
+async def get_status(file_id: str):
+    status = status_store.get_status(file_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Unknown file_id")
+    return status
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    logging.basicConfig(format="%(message)s", level=logging.INFO)
+    uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,797 @@
+import base64
+import functools
+import hashlib
+import io
+import json
+import logging
+import os
+import shelve
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain, groupby
+from operator import itemgetter
+
+import cv2
+import numpy as np
+import requests
+from PIL import Image
+from requests.adapters import HTTPAdapter
+
+try:
+    import simplejpeg  # direct libjpeg-turbo bindings with SIMD fast-DCT
+except ImportError:
+    simplejpeg = None
+
+try:
+    import pybase64 as _b64  # runtime-dispatched SSSE3/AVX2 base64 codec
+except ImportError:
+    _b64 = base64
+
+try:
+    import orjson  # C JSON encoder; much faster on base64-heavy payloads
+except ImportError:
+    orjson = None
+
+OLLAMA_URL = "http://localhost:11434/api/generate"
+
+# Module logger: print() paid a syscall per message while holding the
+# GIL; a logger is buffered by its handler and level-gated.
+log = logging.getLogger("pdf_parser")
+
+# Docling (and the torch stack underneath it) takes seconds to import,
+# which is pure waste for consumers that only want the light helpers
+# (strip_b64_header, df_to_markdown_fast, ...). The imports are
+# deferred to _ensure_docling(), called by everything that actually
+# converts or walks a document.
+DocumentConverter = None
+PdfFormatOption = None
+InputFormat = None
+PdfPipelineOptions = None
+TableFormerMode = None
+AcceleratorOptions = None
+AcceleratorDevice = None
+ListItem = None
+PictureItem = None
+SectionHeaderItem = None
+TableItem = None
+TextItem = None
+
+# Exact-type dispatch for the per-item hot loop: one O(1) dict lookup
+# replaces an isinstance cascade that walked the class hierarchy for
+# every item. Items of any other type are skipped. Built alongside the
+# lazy docling import, as is _TEXT_RENDER (the per-type markdown
+# renderers, which receive the item and its already-stripped text).
+_ITEM_KINDS = None
+_TEXT_RENDER = None
+
+_docling_lock = threading.Lock()
+
+
+def _ensure_docling():
+    """Imports docling on first use and builds the dispatch tables."""
+    global DocumentConverter, PdfFormatOption, InputFormat
+    global PdfPipelineOptions, TableFormerMode
+    global AcceleratorOptions, AcceleratorDevice
+    global ListItem, PictureItem, SectionHeaderItem, TableItem, TextItem
+    global _ITEM_KINDS, _TEXT_RENDER
+
+    if DocumentConverter is not None:
+        return
+    with _docling_lock:
+        if DocumentConverter is not None:
+            return
+        from docling.document_converter import (
+            DocumentConverter as _DC,
+            PdfFormatOption as _PFO,
+        )
+        from docling.datamodel.base_models import InputFormat as _IF
+        from docling.datamodel.pipeline_options import (
+            AcceleratorDevice as _AD,
+            AcceleratorOptions as _AO,
+            PdfPipelineOptions as _PPO,
+            TableFormerMode as _TFM,
+        )
+        from docling_core.types.doc import (
+            ListItem as _LI,
+            PictureItem as _PI,
+            SectionHeaderItem as _SHI,
+            TableItem as _TI,
+            TextItem as _TXI,
+        )
+
+        PdfFormatOption = _PFO
+        InputFormat = _IF
+        PdfPipelineOptions = _PPO
+        TableFormerMode = _TFM
+        AcceleratorOptions = _AO
+        AcceleratorDevice = _AD
+        ListItem, PictureItem = _LI, _PI
+        SectionHeaderItem, TableItem, TextItem = _SHI, _TI, _TXI
+
+        _ITEM_KINDS = {
+            _TI: "table",
+            _PI: "image",
+            _TXI: "text",
+            _SHI: "text",
+            _LI: "text",
+        }
+        _TEXT_RENDER = {
+            _SHI: lambda item, txt: f"{'#' * getattr(item, 'level', 2)} {txt}",
+            _LI: lambda item, txt: f"* {txt}",
+            _TXI: lambda item, txt: txt,
+        }
+        # Assign last: it doubles as the "docling is loaded" flag.
+        DocumentConverter = _DC
+
+
+_converter_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=4)
+def _build_converter(do_ocr, table_mode, generate_picture_images):
+    pipeline_options = PdfPipelineOptions()
+    pipeline_options.do_ocr = do_ocr
+    pipeline_options.do_table_structure = True
+    pipeline_options.table_structure_options.mode = table_mode
+    pipeline_options.generate_picture_images = generate_picture_images
+    pipeline_options.images_scale = 2.0
+    # Defaults leave Docling single-threaded on CPU; AUTO picks up CUDA
+    # or MPS when present and 8 threads keeps multi-core CPUs busy.
+    pipeline_options.accelerator_options = AcceleratorOptions(
+        num_threads=8, device=AcceleratorDevice.AUTO
+    )
+    return DocumentConverter(
+        format_options={
+            InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)
+        }
+    )
+
+
+def get_converter(
+    do_ocr=True,
+    table_mode=None,
+    generate_picture_images=True,
+):
+    """
+    Returns a process-wide shared DocumentConverter for the given
+    options (table_mode defaults to TableFormerMode.ACCURATE). Docling
+    loads its OCR and TableFormer models lazily on first use, which
+    costs seconds; sharing one converter per option tuple amortizes
+    that over every file instead of paying it per call.
+    """
+    _ensure_docling()
+    if table_mode is None:
+        table_mode = TableFormerMode.ACCURATE
+    with _converter_lock:
+        return _build_converter(do_ocr, table_mode, generate_picture_images)
+
+
+def df_to_markdown_fast(df) -> str:
+    """
+    Renders a DataFrame as a markdown pipe table directly from its
+    values, skipping pandas' per-cell formatter machinery (and the
+    tabulate dependency that DataFrame.to_markdown pulls in).
+    """
+    cols = [str(c) for c in df.columns]
+    lines = ["| " + " | ".join(cols) + " |", "|" + "---|" * len(cols)]
+    for row in df.to_numpy(dtype=object):
+        lines.append(
+            "| " + " | ".join("" if v is None else str(v) for v in row) + " |"
+        )
+    return "\n".join(lines)
+
+
+def _pil_to_rgb_array(pil_image):
+    """
+    Returns the image as an RGB ndarray. Docling hands back RGB PIL
+    images, so the common case wraps the existing pixel buffer instead
+    of paying convert()'s full-image copy; other modes fall back to it.
+    """
+    if pil_image.mode == "RGB":
+        width, height = pil_image.size
+        return np.frombuffer(pil_image.tobytes(), dtype=np.uint8).reshape(
+            height, width, 3
+        )
+    return np.asarray(pil_image.convert("RGB"))
+
+
+def _encode_image_bytes(pil_image):
+    """
+    Encodes a PIL image to (bytes, mime type).
+
+    JPEG (quality 85) is the default: the encode goes through
+    libjpeg-turbo, which is far faster than PIL's PNG path and produces
+    a much smaller payload. Set YOLOX_PAGE_IMAGE_FORMAT=png for
+    lossless output (OpenCV PNG at compression level 1).
+    """
+    fmt = os.environ.get("YOLOX_PAGE_IMAGE_FORMAT", "jpeg").lower()
+    if fmt == "png":
+        arr = _pil_to_rgb_array(pil_image)[:, :, ::-1]
+        ok, buf = cv2.imencode(".png", arr, [int(cv2.IMWRITE_PNG_COMPRESSION), 1])
+        if not ok:
+            raise ValueError("cv2.imencode failed to encode image")
+        data = buf.tobytes()
+        mime = "image/png"
+    else:
+        arr = _pil_to_rgb_array(pil_image)
+        if simplejpeg is not None:
+            # No BytesIO temporary and no BGR flip: simplejpeg takes RGB
+            # straight to libjpeg-turbo's integer SIMD DCT.
+            data = simplejpeg.encode_jpeg(
+                np.ascontiguousarray(arr), quality=85, colorspace="RGB", fastdct=True
+            )
+        else:
+            ok, buf = cv2.imencode(
+                ".jpg", arr[:, :, ::-1], [int(cv2.IMWRITE_JPEG_QUALITY), 85]
+            )
+            if not ok:
+                raise ValueError("cv2.imencode failed to encode image")
+            data = buf.tobytes()
+        mime = "image/jpeg"
+    return data, mime
+
+
+def _encode_b64(pil_image):
+    """Encodes a PIL image to a base64 data URI."""
+    data, mime = _encode_image_bytes(pil_image)
+    return f"data:{mime};base64," + _b64.b64encode(data).decode("ascii")
+
+
+def strip_b64_header(b64_image: str) -> str:
+    """
+    Strips a data-URI prefix so only the raw base64 payload remains.
+    Shared with the enrichment stage so the two never drift.
+    """
+    if b64_image.startswith("data:"):
+        return b64_image.split(",", 1)[1]
+    return b64_image
+
+
+class PDFParser:
+    """
+    Parses a PDF with Docling into an ordered list of text/table/image
+    blocks, then optionally enriches images and tables with descriptions
+    from a local Ollama server.
+    """
+
+    def __init__(
+        self,
+        image_mode: str = "sidecar",
+        images_dir: str = "images",
+        img_summarizer_model: str = "moondream:v2-q4",
+    ):
+        """
+        image_mode "sidecar" (default) writes each extracted picture to
+        images_dir and stores only its path and dimensions in the JSON;
+        "inline" keeps the old base64-data-URI-in-JSON behaviour.
+
+        img_summarizer_model defaults to the int4 moondream variant,
+        which roughly doubles summarizer throughput; pass the full
+        "moondream:v2" to trade speed back for quality.
+        """
+        log.info("Configuring Docling converter...")
+        _ensure_docling()
+        self.image_mode = image_mode
+        self.images_dir = images_dir
+        # Shared across instances: model loading dominates single-file
+        # runs, and callers batching many PDFs should also reuse one
+        # PDFParser instance so the description cache carries over.
+        self.converter = get_converter(
+            do_ocr=True,
+            table_mode=TableFormerMode.ACCURATE,
+            generate_picture_images=True,
+        )
+
+        self.ollama_url = OLLAMA_URL
+        self.ollama_img_summarizer_model = img_summarizer_model
+        self.ollama_table_summarizer_model = "gemma3"
+        # Vision models resize internally, so pixels beyond this long
+        # side are pure upload and preprocessing cost.
+        self.max_describe_dim = 512
+        # Stored images are capped too: scanned-page pictures come out
+        # of Docling at 3000x4000+, and every downstream stage (encode,
+        # JSON, Ollama upload) pays for the extra area.
+        self.max_image_dim = 1024
+
+        # One pooled session for all Ollama calls: the per-call TCP
+        # handshake is pure overhead when requests run concurrently.
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self.max_workers = 8
+
+        # Identical pictures (logos, stamps, signatures) recur within and
+        # across documents; cache descriptions by content hash so each
+        # unique image costs one Ollama call. The shelve file makes
+        # reruns of the same PDF free.
+        self._desc_cache: dict = {}
+        self._desc_cache_lock = threading.Lock()
+        self._desc_cache_path = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), ".image_desc_cache"
+        )
+        try:
+            with shelve.open(self._desc_cache_path) as db:
+                self._desc_cache.update(db)
+        except OSError as exc:
+            log.warning("Could not load description cache: %s", exc)
+
+        # Pictures smaller than this are decorative (icons, bullets) and skipped.
+        self.min_width = 32
+        self.min_height = 32
+        self.min_area = 2048
+
+        # Below this many characters from the fast (no-OCR) pass, the
+        # document is assumed scanned and re-converted with OCR.
+        self.min_text_chars = 32
+
+    def _convert_two_tier(self, file_path: str):
+        """
+        Converts with a fast no-OCR pipeline first; most PDFs carry a
+        text layer, and OCR dominates conversion time. Only when the
+        fast pass yields almost no text is the file re-converted with
+        the full OCR + accurate-tables pipeline.
+        """
+        fast_converter = get_converter(
+            do_ocr=False,
+            table_mode=TableFormerMode.FAST,
+            generate_picture_images=True,
+        )
+        doc = fast_converter.convert(file_path).document
+        text_chars = 0
+        for item, _level in doc.iterate_items():
+            text = getattr(item, "text", None)
+            if text:
+                text_chars += len(text.strip())
+                if text_chars >= self.min_text_chars:
+                    log.info("Using fast tier (text layer present).")
+                    return doc
+        log.info("Fast tier found no text layer; re-converting with OCR...")
+        return self.converter.convert(file_path).document
+
+    def parse_pdf(
+        self,
+        file_path: str,
+        output_json_file: str = "extracted_document.json",
+        describe_images: bool = True,
+        describe_tables: bool = True,
+    ):
+        """
+        Full pipeline: convert, extract structured blocks, merge
+        cross-page runs, enrich with descriptions, and save JSON.
+        """
+        log.info("Parsing %s ...", file_path)
+        doc = self._convert_two_tier(file_path)
+
+        data = self.extract_structured_json(doc)
+        data = self.merge_cross_page_blocks(data)
+
+        if describe_images:
+            data = self._add_image_descriptions(data)
+        if describe_tables:
+            data = self.add_table_descriptions(data)
+
+        self.save_json(data, output_json_file)
+        return data
+
+    def parse_pdfs(
+        self,
+        paths,
+        output_dir: str = ".",
+        describe_images: bool = True,
+        describe_tables: bool = True,
+    ):
+        """
+        Batch variant of parse_pdf built on Docling's convert_all, which
+        pipelines conversion of file N+1 with the post-processing of
+        file N. Yields (output_path, data) as each document completes.
+        """
+        log.info("Parsing %d PDFs in batch...", len(paths))
+        for conv_res in self.converter.convert_all(paths):
+            data = self.extract_structured_json(conv_res.document)
+            data = self.merge_cross_page_blocks(data)
+            if describe_images:
+                data = self._add_image_descriptions(data)
+            if describe_tables:
+                data = self.add_table_descriptions(data)
+            output_path = os.path.join(output_dir, conv_res.input.file.stem + ".json")
+            self.save_json(data, output_path)
+            yield output_path, data
+
+    def extract_structured_json(self, doc):
+        """
+        Walks the document and emits an ordered list of dicts with
+        page_no, content_type ("text" | "table" | "image"), and
+        page_content.
+        """
+        _ensure_docling()
+        output_data = []
+        current_page = -1
+        doc_hash = hashlib.blake2b(
+            str(getattr(doc, "name", "")).encode("utf-8"), digest_size=8
+        ).hexdigest()
+        image_idx = 0
+
+        # Text accumulates in one StringIO reused across flushes, which
+        # avoids the per-flush list reallocation and the intermediate
+        # strings a list-append + join cycle leaves for the GC. The
+        # bound writers stay valid for the whole scan.
+        current_text_buf = io.StringIO()
+        buf_write = current_text_buf.write
+        output_append = output_data.append
+
+        def flush_buffer(page_no):
+            if current_text_buf.tell():
+                output_append(
+                    {
+                        "page_no": page_no,
+                        "content_type": "text",
+                        "page_content": current_text_buf.getvalue().rstrip("\n"),
+                    }
+                )
+                current_text_buf.seek(0)
+                current_text_buf.truncate()
+
+        for item, _level in doc.iterate_items():
+            kind = _ITEM_KINDS.get(type(item))
+            if kind is None:
+                continue
+
+            prov = getattr(item, "prov", None)
+            item_page = prov[0].page_no if prov else -1
+
+            if current_page != -1 and item_page != current_page:
+                flush_buffer(current_page)
+            current_page = item_page
+
+            if kind == "table":
+                flush_buffer(item_page)
+                df = item.export_to_dataframe()
+                output_append(
+                    {
+                        "page_no": item_page,
+                        "content_type": "table",
+                        "page_content": df_to_markdown_fast(df),
+                    }
+                )
+            elif kind == "image":
+                # Filter on the layout bbox first: get_image triggers the
+                # expensive rasterization, so tiny icons should never
+                # reach it.
+                if prov:
+                    bbox = prov[0].bbox
+                    bbox_w = abs(bbox.r - bbox.l)
+                    bbox_h = abs(bbox.t - bbox.b)
+                    if (
+                        bbox_w < self.min_width
+                        or bbox_h < self.min_height
+                        or bbox_w * bbox_h < self.min_area
+                    ):
+                        continue
+                img_obj = item.get_image(doc)
+                if img_obj is None:
+                    continue
+                width, height = img_obj.size
+                if (
+                    width < self.min_width
+                    or height < self.min_height
+                    or width * height < self.min_area
+                ):
+                    continue
+                if max(width, height) > self.max_image_dim:
+                    # Already decoded by Docling, so shrink-on-load does
+                    # not apply; LANCZOS keeps small text legible.
+                    img_obj.thumbnail(
+                        (self.max_image_dim, self.max_image_dim), Image.LANCZOS
+                    )
+                    width, height = img_obj.size
+                flush_buffer(item_page)
+                if self.image_mode == "sidecar":
+                    entry = self._save_image_sidecar(
+                        img_obj, doc_hash, item_page, image_idx
+                    )
+                else:
+                    entry = self._image_to_base64(img_obj)
+                image_idx += 1
+                output_append(
+                    {
+                        "page_no": item_page,
+                        "content_type": "image",
+                        "page_content": [entry],
+                    }
+                )
+            else:
+                txt = item.text.strip()
+                if not txt:
+                    continue
+                render = _TEXT_RENDER.get(type(item))
+                if render:
+                    buf_write(render(item, txt))
+                    buf_write("\n\n")
+
+        flush_buffer(current_page)
+        # iterate_items already yields in document order, so the blocks
+        # come out page-sorted; no O(n log n) re-sort needed.
+        if __debug__:
+            assert all(
+                a["page_no"] <= b["page_no"] or b["page_no"] == -1
+                for a, b in zip(output_data, output_data[1:])
+            ), "iterate_items yielded out-of-order pages"
+        return output_data
+
+    def merge_cross_page_blocks(self, data):
+        """
+        Merges consecutive blocks of the same content_type so text that
+        continues across a page break stays in one block.
+
+        Each run of same-type blocks is joined in one pass, so there is
+        no repeated string concatenation or per-block dict copy.
+        """
+        merged = []
+        for content_type, grp in groupby(data, key=itemgetter("content_type")):
+            grp = list(grp)
+            pages = [b["page_no"] for b in grp]
+            if content_type == "image":
+                content = list(chain.from_iterable(b["page_content"] for b in grp))
+            else:
+                content = "\n\n".join(b["page_content"] for b in grp)
+            merged.append(
+                {
+                    "page_no": pages[0]
+                    if pages[0] == pages[-1]
+                    else f"{pages[0]}-{pages[-1]}",
+                    "content_type": content_type,
+                    "page_content": content,
+                }
+            )
+        return merged
+
+    def _image_to_base64(self, img_obj):
+        return _encode_b64(img_obj)
+
+    def _save_image_sidecar(self, img_obj, doc_hash: str, page_no, idx: int):
+        """
+        Writes one picture as a binary sidecar file and returns a light
+        reference dict for the JSON. Keeping raw image bytes out of the
+        JSON shrinks it by the base64 factor and lets consumers load
+        pictures independently of the document.
+        """
+        os.makedirs(self.images_dir, exist_ok=True)
+        data, mime = _encode_image_bytes(img_obj)
+        ext = ".png" if mime == "image/png" else ".jpg"
+        path = os.path.join(self.images_dir, f"{doc_hash}_{page_no}_{idx}{ext}")
+        with open(path, "wb") as f:
+            f.write(data)
+        width, height = img_obj.size
+        return {"path": path, "width": width, "height": height, "page": page_no}
+
+    _to_b64_payload = staticmethod(strip_b64_header)
+
+    def _describe_base64_image(self, image_ref) -> str:
+        """
+        Returns a short description of one image reference — either a
+        base64 data URI or a sidecar {"path": ...} dict — memoized on
+        the hash of the raw image bytes (not the base64 text, so
+        encoding variance cannot cause a cache miss).
+        """
+        if isinstance(image_ref, dict):
+            with open(image_ref["path"], "rb") as f:
+                raw = f.read()
+        else:
+            raw = _b64.b64decode(self._to_b64_payload(image_ref))
+        digest = hashlib.blake2b(raw, digest_size=16).hexdigest()
+        cache_key = f"{self.ollama_img_summarizer_model}:{digest}"
+
+        with self._desc_cache_lock:
+            if cache_key in self._desc_cache:
+                return self._desc_cache[cache_key]
+
+        description = self._describe_base64_image_uncached(
+            self._downscale_payload(raw)
+        )
+
+        if description:
+            with self._desc_cache_lock:
+                self._desc_cache[cache_key] = description
+                with shelve.open(self._desc_cache_path) as db:
+                    db[cache_key] = description
+        return description
+
+    def _downscale_payload(self, raw: bytes) -> str:
+        """
+        Returns the base64 payload to send to the summarizer: the image
+        capped at max_describe_dim on its long side and re-encoded as
+        JPEG q=80. Cache keys stay on the original bytes, so this only
+        runs on cache misses.
+        """
+        arr = cv2.imdecode(np.frombuffer(raw, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if arr is None:
+            return _b64.b64encode(raw).decode("ascii")
+        height, width = arr.shape[:2]
+        long_side = max(height, width)
+        if long_side > self.max_describe_dim:
+            scale = self.max_describe_dim / long_side
+            arr = cv2.resize(
+                arr,
+                (max(1, round(width * scale)), max(1, round(height * scale))),
+                interpolation=cv2.INTER_AREA,
+            )
+        ok, buf = cv2.imencode(".jpg", arr, [int(cv2.IMWRITE_JPEG_QUALITY), 80])
+        if not ok:
+            return _b64.b64encode(raw).decode("ascii")
+        return _b64.b64encode(buf.tobytes()).decode("ascii")
+
+    def _post_ollama(self, payload: dict):
+        """
+        POSTs one generate request. The payload is pre-serialized with
+        orjson so requests' stdlib json.dumps does not re-walk the
+        multi-MB base64 strings on every call.
+        """
+        if orjson is not None:
+            return self._session.post(
+                self.ollama_url,
+                data=orjson.dumps(payload),
+                headers={"Content-Type": "application/json"},
+                timeout=180,
+            )
+        return self._session.post(self.ollama_url, json=payload, timeout=180)
+
+    def _describe_base64_image_uncached(self, b64_payload: str) -> str:
+        """Asks the Ollama vision model for a short description of one image."""
+        payload = {
+            "model": self.ollama_img_summarizer_model,
+            "prompt": "Describe this image in two or three sentences.",
+            "images": [b64_payload],
+            "stream": False,
+            # Keep the model resident between calls so consecutive
+            # requests do not pay a weight reload.
+            "keep_alive": "10m",
+        }
+        try:
+            response = self._post_ollama(payload)
+            response.raise_for_status()
+            return response.json().get("response", "").strip()
+        except requests.RequestException as exc:
+            log.warning("Ollama image description failed: %s", exc)
+            return ""
+
+    def _add_image_descriptions(self, data):
+        """
+        Adds an `image_descriptions` list to every image block.
+
+        Descriptions for all images are fetched concurrently: each call
+        is network/GPU-bound on the Ollama side, so a thread pool
+        overlaps the round-trips instead of paying them one by one.
+        """
+        jobs = []  # (block_idx, img_idx, ref) for every image needing a description
+        for block_idx, block in enumerate(data):
+            if block["content_type"] != "image":
+                continue
+            block["image_descriptions"] = [""] * len(block["page_content"])
+            for img_idx, image_ref in enumerate(block["page_content"]):
+                jobs.append((block_idx, img_idx, image_ref))
+
+        if not jobs:
+            return data
+
+        log.info("Describing %d images (%d workers)...", len(jobs), self.max_workers)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = executor.map(self._describe_base64_image, [j[2] for j in jobs])
+            for (block_idx, img_idx, _), description in zip(jobs, results):
+                data[block_idx]["image_descriptions"][img_idx] = description
+        return data
+
+    def _summarize_table(self, table_markdown: str) -> str:
+        """Asks the Ollama text model for a short summary of one table."""
+        payload = {
+            "model": self.ollama_table_summarizer_model,
+            "prompt": (
+                "Summarize the following table in two or three sentences, "
+                "mentioning the most important values:\n\n"
+                f"{table_markdown}"
+            ),
+            "stream": False,
+            # Keep the model resident between calls so consecutive
+            # requests do not pay a weight reload.
+            "keep_alive": "10m",
+        }
+        try:
+            response = self._post_ollama(payload)
+            response.raise_for_status()
+            return response.json().get("response", "").strip()
+        except requests.RequestException as exc:
+            log.warning("Ollama table summary failed: %s", exc)
+            return ""
+
+    def add_table_descriptions(self, data):
+        """
+        Adds a `table_description` summary to every table block, using
+        the same concurrent fan-out as `_add_image_descriptions`.
+        """
+        table_blocks = [b for b in data if b["content_type"] == "table"]
+        if not table_blocks:
+            return data
+
+        log.info("Summarizing %d tables (%d workers)...", len(table_blocks), self.max_workers)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            summaries = executor.map(
+                self._summarize_table, [b["page_content"] for b in table_blocks]
+            )
+            for block, summary in zip(table_blocks, summaries):
+                block["table_description"] = summary
+        return data
+
+    def save_json(self, data, output_path: str):
+        if orjson is not None:
+            # orjson emits UTF-8 bytes directly; 2-space indent keeps the
+            # file readable without stdlib's per-character escape walk.
+            with open(output_path, "wb") as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        else:
+            with open(output_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+        log.info("Structured JSON saved to: %s", output_path)
+
+
+# One parser per worker process, built on first use so the pool fork
+# does not serialize model state.
+_WORKER_PARSER = None
+
+
+def _parse_one(args):
+    global _WORKER_PARSER
+    path, output_dir = args
+    if _WORKER_PARSER is None:
+        _WORKER_PARSER = PDFParser()
+    output_path = os.path.join(
+        output_dir, os.path.splitext(os.path.basename(path))[0] + ".json"
+    )
+    return _WORKER_PARSER.parse_pdf(path, output_json_file=output_path)
+
+
+def parse_pdfs_parallel(paths, output_dir: str = ".", workers: int = None):
+    """
+    Converts many PDFs across worker processes. Docling releases the
+    GIL inside its torch/C backends, but separate processes also keep
+    page rasterization and JSON assembly off one interpreter, scaling
+    near-linearly until the GPU or memory saturates.
+    """
+    if workers is None:
+        workers = max(1, (os.cpu_count() or 2) // 2)
+    log.info("Parsing %d PDFs across %d processes...", len(paths), workers)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_parse_one, [(p, output_dir) for p in paths]))
+
+
+def _warm():
+    get_converter(do_ocr=True, generate_picture_images=True)
+
+
+_warm_started = False
+
+
+def start_eager_warm():
+    """
+    Starts loading the Docling models on a background thread, so the
+    first conversion does not pay the multi-second warmup on top of its
+    own work. Called by consumers that are about to convert — never at
+    module import, which would drag docling + torch into processes that
+    only want the light helpers (the enrichment stage imports
+    strip_b64_header from here). Set PDFPARSER_EAGER_WARM=0 to opt out.
+    """
+    global _warm_started
+    if _warm_started or os.environ.get("PDFPARSER_EAGER_WARM", "1") != "1":
+        return
+    _warm_started = True
+    threading.Thread(target=_warm, daemon=True).start()
+
+
+# --- Usage Example ---
+if __name__ == "__main__":
+    logging.basicConfig(format="%(message)s", level=logging.INFO)
+    start_eager_warm()
+    parser = PDFParser()
+    parser.parse_pdf(
+        "CRPL-1N60001074-CADPO110494.pdf",
+        output_json_file="extracted_document.json",
+    )
@@ -0,0 +1,119 @@
+"""
+End-to-end offline pipeline: enriched document data -> chunks ->
+embeddings -> Chroma, feeding the chunker output straight into the
+store instead of writing a chunk file that the embedder re-reads.
+"""
+
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from chroma_db import ChromaDBManager
+from chunker import DocumentChunker
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+log = logging.getLogger("pipeline")
+
+
+def _load_enriched(input_path):
+    """Reads either the .jsonl stream or a plain JSON array."""
+    if input_path.endswith(".jsonl"):
+        with open(input_path, "rb") as f:
+            if orjson is not None:
+                return [orjson.loads(line) for line in f if line.strip()]
+            return [json.loads(line) for line in f if line.strip()]
+    if orjson is not None:
+        with open(input_path, "rb") as f:
+            return orjson.loads(f.read())
+    with open(input_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _chunk_file(input_path):
+    """Loads and chunks one enriched file; module-level so it pickles."""
+    return DocumentChunker().process_data(_load_enriched(input_path))
+
+
+def run_pipeline_many(
+    input_paths,
+    db_manager: ChromaDBManager = None,
+    batch_size: int = 500,
+    workers: int = None,
+):
+    """
+    Chunks several enriched files in parallel worker processes —
+    chunking is pure-Python CPU work, so threads gain nothing under the
+    GIL — then ingests everything through one manager so the delta skip
+    and embedding cache are shared across files.
+    """
+    db = db_manager or ChromaDBManager()
+    total = 0
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for path, chunks in zip(input_paths, pool.map(_chunk_file, input_paths)):
+            total += _ingest_chunks(chunks, db, batch_size)
+            log.info("✅ Finished %s", path)
+    log.info("✅ Pipeline ingested %d new chunks from %d files", total, len(input_paths))
+    return total
+
+
+def run_pipeline(
+    input_path: str = "enriched_rag_data.jsonl",
+    db_manager: ChromaDBManager = None,
+    batch_size: int = 500,
+    dump_intermediate: str = None,
+):
+    """
+    Chunks the enriched data and ingests the result directly. The
+    chunk file round-trip (serialize 100+ MB, read it back) is gone;
+    pass dump_intermediate=<path> to still write the chunks for
+    inspection. Each batch's embed+write runs on a writer thread while
+    the next batch's payload is built, overlapping the stages.
+    """
+    data = _load_enriched(input_path)
+    chunks = DocumentChunker().process_data(data)
+    if dump_intermediate:
+        if orjson is not None:
+            with open(dump_intermediate, "wb") as f:
+                f.write(orjson.dumps(chunks))
+        else:
+            with open(dump_intermediate, "w", encoding="utf-8") as f:
+                json.dump(chunks, f, ensure_ascii=False)
+
+    db = db_manager or ChromaDBManager()
+    total = _ingest_chunks(chunks, db, batch_size)
+    log.info("✅ Pipeline ingested %d new chunks from %s", total, input_path)
+    return total
+
+
+def _ingest_chunks(chunks, db, batch_size):
+    """Batched embed+write with the prep/write stages overlapped."""
+    total = 0
+    with ThreadPoolExecutor(max_workers=1) as writer:
+        pending = None
+        for i in range(0, len(chunks), batch_size):
+            batch = chunks[i : i + batch_size]
+            contents = [c["content"] for c in batch]
+            metadatas = [
+                {
+                    "content_type": c["content_type"],
+                    "page_no": c["page_no"] if c["page_no"] is not None else -1,
+                    "neighbour": ",".join(c["neighbour"]),
+                }
+                for c in batch
+            ]
+            if pending is not None:
+                total += pending.result()
+            pending = writer.submit(db.add_documents, contents, metadatas)
+        if pending is not None:
+            total += pending.result()
+    return total
+
+
+if __name__ == "__main__":
+    logging.basicConfig(format="%(message)s", level=logging.INFO)
+    run_pipeline()
@@ -0,0 +1,90 @@
+"""
+SQLite-backed processing status for the API. A process-local dict is
+lost on restart and can't be shared across workers; this keeps file
+and per-step state in two small tables with O(1) upserts.
+"""
+
+import sqlite3
+import threading
+from datetime import datetime
+
+
+class StatusStore:
+    def __init__(self, path: str = "status.sqlite"):
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS files (file_id TEXT PRIMARY KEY,"
+            " file_name TEXT, success INTEGER, started_at TEXT, completed_at TEXT)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS steps (file_id TEXT, step TEXT,"
+            " status TEXT, details TEXT, ts TEXT, PRIMARY KEY (file_id, step))"
+        )
+        self._db.commit()
+
+    def register_file(self, file_id: str, file_name: str):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO files (file_id, file_name, success,"
+                " started_at) VALUES (?, ?, NULL, ?)",
+                (file_id, file_name, datetime.now().isoformat()),
+            )
+            self._db.commit()
+
+    def update_step(self, file_id: str, step: str, status: str, details: str = ""):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR IGNORE INTO files (file_id, started_at)"
+                " VALUES (?, ?)",
+                (file_id, datetime.now().isoformat()),
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO steps (file_id, step, status, details, ts)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (file_id, step, status, details, datetime.now().isoformat()),
+            )
+            self._db.commit()
+
+    def set_success(self, file_id: str, success: bool):
+        with self._lock:
+            self._db.execute(
+                "UPDATE files SET success = ?, completed_at = ? WHERE file_id = ?",
+                (int(success), datetime.now().isoformat(), file_id),
+            )
+            self._db.commit()
+
+    def get_status(self, file_id: str):
+        row = self._db.execute(
+            "SELECT file_name, success, started_at, completed_at FROM files"
+            " WHERE file_id = ?",
+            (file_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        steps = {
+            step: {"status": status, "details": details, "ts": ts}
+            for step, status, details, ts in self._db.execute(
+                "SELECT step, status, details, ts FROM steps WHERE file_id = ?",
+                (file_id,),
+            )
+        }
+        return {
+            "file_name": row[0],
+            "success": None if row[1] is None else bool(row[1]),
+            "started_at": row[2],
+            "completed_at": row[3],
+            "steps": steps,
+        }
+
+    def list_files(self):
+        return [
+            {
+                "file_id": file_id,
+                "file_name": file_name,
+                "success": None if success is None else bool(success),
+            }
+            for file_id, file_name, success in self._db.execute(
+                "SELECT file_id, file_name, success FROM files"
+            )
+        ]
@@ -0,0 +1,61 @@
+"""
+USearch HNSW store as an alternative to Chroma's index: a single-file
+dependency whose f16 quantization halves index RAM, with SIMD cosine
+kernels that search noticeably faster at the same recall. Built from a
+Chroma collection dump, so the collection stays the source of truth.
+"""
+
+import logging
+
+import numpy as np
+
+try:
+    from usearch.index import Index
+except ImportError:
+    Index = None
+
+log = logging.getLogger("usearch_store")
+
+
+class USearchStore:
+    """Cosine HNSW index over half-precision vectors."""
+
+    def __init__(self, dim: int, dtype: str = "f16", connectivity: int = 24):
+        if Index is None:
+            raise ImportError("usearch is required for USearchStore")
+        self.dim = dim
+        self.index = Index(
+            ndim=dim, metric="cos", dtype=dtype, connectivity=connectivity
+        )
+        self.documents = []
+        self.metadatas = []
+
+    @classmethod
+    def from_chroma(cls, collection, dtype: str = "f16"):
+        """Builds the index from an existing Chroma collection in one get."""
+        dump = collection.get(include=["embeddings", "documents", "metadatas"])
+        embeddings = np.asarray(dump["embeddings"], dtype=np.float32)
+        store = cls(dim=embeddings.shape[1], dtype=dtype)
+        store.add(embeddings, dump["documents"], dump["metadatas"])
+        log.info("✅ USearch index built from %d Chroma vectors", len(embeddings))
+        return store
+
+    def add(self, vectors, documents, metadatas=None):
+        arr = np.ascontiguousarray(vectors, dtype=np.float32)
+        start = len(self.documents)
+        self.index.add(np.arange(start, start + len(arr)), arr)
+        self.documents.extend(documents)
+        self.metadatas.extend(metadatas or [{}] * len(documents))
+        return len(documents)
+
+    def search(self, query_vector, k: int = 5):
+        q = np.asarray(query_vector, dtype=np.float32)
+        matches = self.index.search(q, min(k, len(self.documents)))
+        return [
+            {
+                "content": self.documents[int(m.key)],
+                "metadata": self.metadatas[int(m.key)],
+                "score": 1.0 - float(m.distance),
+            }
+            for m in matches
+        ]